@@ -6,6 +6,8 @@ import pandas as pd
 from PyPDF2 import PdfReader
 
 from pipeline import process_file
+from config import METADATA_DB_PATH
+from metadata_store import open_store, upsert_result
 
 def main():
     st.title("Metadata Extractor - Multi-file LLM-Enhanced")
@@ -18,6 +20,11 @@ def main():
 
     if uploaded_files:
         files_to_process = uploaded_files[:15]
+        try:
+            conn = open_store(METADATA_DB_PATH)
+        except Exception as e:
+            st.warning(f"Metadata store unavailable, results will not be saved: {e}")
+            conn = None
         for uploaded_file in files_to_process:
             file_name = uploaded_file.name
 
@@ -39,6 +46,14 @@ def main():
                 results = process_file(temp_path)
                 end_time = time.time()
 
+                # Persist before the temp file is removed (the hash is read from disk).
+                # The temp copy is deleted below, so store the upload name as the path.
+                if conn is not None:
+                    try:
+                        upsert_result(conn, results, source="streamlit", source_path=file_name)
+                    except Exception as e:
+                        st.warning(f"Could not save metadata for {file_name}: {e}")
+
                 file_type = results.get("file_type", "unknown")
                 st.write(f"**Detected File Type**: {file_type}")
 
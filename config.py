@@ -20,3 +20,8 @@ if not OPENAI_API_KEY:
     logging.warning("OpenAI API Key is not set. Check your .env file or environment.")
 else:
     logging.info("OpenAI API Key successfully loaded.")
+
+# 5. Location of the SQLite metadata store for processed results.
+#    Defaults to the project directory (not the cwd) so every run shares one store.
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+METADATA_DB_PATH = os.getenv("METADATA_DB_PATH", os.path.join(PROJECT_DIR, "metadata.db"))
@@ -4,22 +4,130 @@ import os
 import json
 import argparse
 import logging
+import sqlite3
 
 from pipeline import process_file
+from config import METADATA_DB_PATH
+from metadata_store import open_store, upsert_result, query_results, export_structure
 
 logger = logging.getLogger(__name__)
 
+def open_existing_store(subparser, db_path):
+    """
+    Open the metadata store for a read-only subcommand, reporting a missing
+    or unopenable store as a usage error instead of creating an empty one.
+    """
+    try:
+        return open_store(db_path, create=False)
+    except FileNotFoundError:
+        subparser.error(f"metadata store not found: {db_path} (process a file first or check --db)")
+    except sqlite3.DatabaseError as e:
+        subparser.error(f"cannot open metadata store {db_path}: {e}")
+
 def main():
+    # --db is accepted both before and after the subcommand. The subcommand copy
+    # uses SUPPRESS so it does not overwrite a value given before the subcommand.
+    db_parent = argparse.ArgumentParser(add_help=False)
+    db_parent.add_argument(
+        "--db",
+        default=argparse.SUPPRESS,
+        help=f"Path to the SQLite metadata store (default: {METADATA_DB_PATH})."
+    )
+
     parser = argparse.ArgumentParser(
         description="Data Abstraction from Different File Types using LLMs."
     )
     parser.add_argument(
-        "--input-file", 
-        required=True, 
+        "--input-file",
         help="Path to the input file (text, excel, csv)."
     )
+    parser.add_argument(
+        "--db",
+        default=METADATA_DB_PATH,
+        help="Path to the SQLite metadata store (default: %(default)s)."
+    )
+    parser.add_argument(
+        "--no-store",
+        action="store_true",
+        help="Do not persist the processed result in the metadata store."
+    )
+
+    subparsers = parser.add_subparsers(dest="command")
+
+    query_parser = subparsers.add_parser(
+        "query", parents=[db_parent],
+        help="Query previously processed results in the metadata store."
+    )
+    query_parser.add_argument("--hash", help="Exact SHA-256 file hash.")
+    query_parser.add_argument("--file-type", help="Filter by file type (pdf, text, excel, csv).")
+    query_parser.add_argument("--name", help="Exact file name (without directory).")
+    query_parser.add_argument("--min-rows", type=int, help="Minimum number of rows.")
+    query_parser.add_argument("--max-rows", type=int, help="Maximum number of rows.")
+    query_parser.add_argument("--min-pages", type=int, help="Minimum number of PDF pages.")
+    query_parser.add_argument("--search", help="Full-text query over summaries and file names.")
+    query_parser.add_argument(
+        "--fts-syntax",
+        action="store_true",
+        help="Pass --search to SQLite FTS5 unchanged (AND/OR/NEAR, prefix*, column:term)."
+    )
+    query_parser.add_argument(
+        "--rank",
+        action="store_true",
+        help="Order --search results by relevance (BM25) instead of most recently added. "
+             "Scores every match, so it is slow for terms found in many files."
+    )
+    query_parser.add_argument("--limit", type=int, default=50, help="Maximum results (default: %(default)s).")
+    query_parser.add_argument("--full", action="store_true", help="Include the full stored result JSON.")
+
+    export_parser = subparsers.add_parser(
+        "export", parents=[db_parent],
+        help="Export structure fields of all stored results to Parquet or CSV."
+    )
+    export_parser.add_argument(
+        "--output",
+        required=True,
+        help="Output path; '.parquet' writes Parquet, anything else CSV."
+    )
 
     args = parser.parse_args()
+
+    if args.command and (args.input_file or args.no_store):
+        parser.error(f"--input-file and --no-store cannot be combined with '{args.command}'.")
+
+    if args.command == "query":
+        conn = open_existing_store(query_parser, args.db)
+        try:
+            records = query_results(
+                conn,
+                file_hash=args.hash,
+                file_type=args.file_type,
+                name=args.name,
+                min_rows=args.min_rows,
+                max_rows=args.max_rows,
+                min_pages=args.min_pages,
+                search=args.search,
+                raw_search=args.fts_syntax,
+                rank=args.rank,
+                limit=args.limit,
+                include_result=args.full,
+            )
+        except sqlite3.OperationalError as e:
+            query_parser.error(f"query failed: {e}")
+        print(json.dumps(records, indent=2))
+        return
+
+    if args.command == "export":
+        conn = open_existing_store(export_parser, args.db)
+        try:
+            count = export_structure(conn, args.output)
+        except ImportError:
+            export_parser.error("Parquet export requires pyarrow (pip install pyarrow), or use a .csv output path.")
+        print(f"Exported {count} records to {args.output}")
+        return
+
+    if not args.input_file:
+        parser.error("--input-file is required unless a subcommand is given.")
+
     file_path = args.input_file
 
     if not os.path.isfile(file_path):
@@ -32,6 +140,15 @@ def main():
     # Print JSON output
     print(json.dumps(results, indent=2))
 
+    # Persist so the result can be queried later without reprocessing;
+    # a store failure must not cost the output of an already-paid LLM run
+    if not args.no_store:
+        try:
+            conn = open_store(args.db)
+            upsert_result(conn, results)
+        except Exception as e:
+            logger.warning(f"Failed to store metadata in {args.db}: {e}")
+
 
 if __name__ == "__main__":
     # Configure logging for the entire application
@@ -39,4 +156,4 @@ if __name__ == "__main__":
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s - %(message)s"
     )
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,324 @@
+# metadata_store.py
+import csv
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+# Structure fields promoted to real (indexed) columns so filters like
+# "rows > 10000" never have to parse the stored JSON.
+STRUCTURE_COLUMNS = [
+    "rows", "cols", "factual_rows", "factual_cols",
+    "pages", "text_length", "lines",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_metadata (
+    id INTEGER PRIMARY KEY,
+    file_hash TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    file_name TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    file_size INTEGER,
+    rows INTEGER,
+    cols INTEGER,
+    factual_rows INTEGER,
+    factual_cols INTEGER,
+    pages INTEGER,
+    text_length INTEGER,
+    lines INTEGER,
+    summary TEXT,
+    error TEXT,
+    result_json TEXT NOT NULL,
+    processed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_file_metadata_type ON file_metadata (file_type, processed_at);
+CREATE INDEX IF NOT EXISTS idx_file_metadata_rows ON file_metadata (rows);
+CREATE INDEX IF NOT EXISTS idx_file_metadata_type_rows ON file_metadata (file_type, rows);
+CREATE INDEX IF NOT EXISTS idx_file_metadata_pages ON file_metadata (pages);
+CREATE INDEX IF NOT EXISTS idx_file_metadata_name ON file_metadata (file_name);
+CREATE INDEX IF NOT EXISTS idx_file_metadata_processed ON file_metadata (processed_at);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS file_summaries_fts USING fts5(
+    file_name, summary, content='file_metadata', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS file_metadata_ai AFTER INSERT ON file_metadata BEGIN
+    INSERT INTO file_summaries_fts (rowid, file_name, summary)
+    VALUES (new.id, new.file_name, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS file_metadata_ad AFTER DELETE ON file_metadata BEGIN
+    INSERT INTO file_summaries_fts (file_summaries_fts, rowid, file_name, summary)
+    VALUES ('delete', old.id, old.file_name, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS file_metadata_au AFTER UPDATE ON file_metadata BEGIN
+    INSERT INTO file_summaries_fts (file_summaries_fts, rowid, file_name, summary)
+    VALUES ('delete', old.id, old.file_name, old.summary);
+    INSERT INTO file_summaries_fts (rowid, file_name, summary)
+    VALUES (new.id, new.file_name, new.summary);
+END;
+"""
+
+
+def compute_file_hash(file_path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Return the SHA-256 hex digest of a file's contents.
+    Used as the upsert key, so renamed or moved copies map to one record.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def open_store(db_path: str, create: bool = True) -> sqlite3.Connection:
+    """
+    Open (or create) the SQLite metadata store and make sure the schema exists.
+    With create=False a missing store raises FileNotFoundError instead of
+    silently starting an empty one.
+    Full-text search is skipped with a warning if SQLite lacks FTS5.
+    """
+    if not create and not os.path.isfile(db_path):
+        raise FileNotFoundError(f"Metadata store not found: {db_path}")
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    try:
+        conn.executescript(FTS_SCHEMA)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"FTS5 unavailable, summary search will use LIKE: {e}")
+    conn.commit()
+    return conn
+
+
+def _has_fts(conn: sqlite3.Connection) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'file_summaries_fts'"
+    ).fetchone()
+    return row is not None
+
+
+def _extract_summary(abstracted: dict) -> str:
+    """
+    Flatten whichever LLM output the pipeline produced into one searchable string.
+    """
+    if "chapter_summaries" in abstracted:
+        return "\n\n".join(abstracted["chapter_summaries"])
+    if "full_doc_summary" in abstracted:
+        return abstracted["full_doc_summary"]
+    return abstracted.get("insights", "")
+
+
+def _as_int(value):
+    # Pipeline counts may be numpy integers, which sqlite3 cannot bind
+    return int(value) if value is not None else None
+
+
+def _json_default(value):
+    # numpy scalars expose .item() to get the plain Python value
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def upsert_result(
+    conn: sqlite3.Connection,
+    results: dict,
+    file_hash: str = None,
+    source: str = "cli",
+    source_path: str = None,
+) -> str:
+    """
+    Insert or update the record for a processed file, keyed by its content hash.
+    The file must still exist on disk unless 'file_hash' is passed in.
+    The file's absolute path is stored, unless 'source_path' is given for a
+    processed file that is only a temporary copy (e.g. a Streamlit upload);
+    'source' says where the record came from. Returns the file hash.
+    """
+    local_path = results["file_path"]
+    # The store is shared across working directories, so relative paths are
+    # resolved here; only an explicit 'source_path' is stored as given
+    file_path = source_path or os.path.abspath(local_path)
+    if file_hash is None:
+        file_hash = compute_file_hash(local_path)
+
+    structure = results.get("structure", {})
+    factual = structure.get("factual_data", {})
+    abstracted = results.get("abstracted_data", {})
+
+    # raw_text can be the whole document; keep the stored JSON to the metadata only
+    stored = {k: v for k, v in results.items() if k != "raw_text"}
+    stored["file_path"] = file_path
+
+    record = {
+        "file_hash": file_hash,
+        "source": source,
+        "file_path": file_path,
+        "file_name": os.path.basename(file_path),
+        "file_type": results.get("file_type", "unknown"),
+        "file_size": os.path.getsize(local_path) if os.path.isfile(local_path) else None,
+        "rows": _as_int(structure.get("rows")),
+        "cols": _as_int(structure.get("cols")),
+        "factual_rows": _as_int(factual.get("factual_rows")),
+        "factual_cols": _as_int(factual.get("factual_cols")),
+        "pages": _as_int(structure.get("pages")),
+        "text_length": _as_int(structure.get("length_of_text", structure.get("length"))),
+        "lines": _as_int(structure.get("lines")),
+        "summary": _extract_summary(abstracted),
+        "error": results.get("error") or abstracted.get("error"),
+        "result_json": json.dumps(stored, default=_json_default),
+        "processed_at": time.time(),
+    }
+
+    columns = ", ".join(record)
+    placeholders = ", ".join(f":{k}" for k in record)
+    updates = ", ".join(f"{k} = excluded.{k}" for k in record if k != "file_hash")
+    with conn:
+        conn.execute(
+            f"INSERT INTO file_metadata ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT (file_hash) DO UPDATE SET {updates}",
+            record,
+        )
+    logger.info(f"Stored metadata for {file_path} (hash={file_hash[:12]})")
+    return file_hash
+
+
+def _fts_phrase_query(search: str) -> str:
+    """
+    Quote every whitespace-separated term so punctuation such as '-', ':'
+    or '+' is matched literally instead of parsed as FTS5 query syntax.
+    """
+    terms = search.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def query_results(
+    conn: sqlite3.Connection,
+    file_hash: str = None,
+    file_type: str = None,
+    name: str = None,
+    min_rows: int = None,
+    max_rows: int = None,
+    min_pages: int = None,
+    search: str = None,
+    raw_search: bool = False,
+    rank: bool = False,
+    limit: int = 50,
+    include_result: bool = False,
+) -> list:
+    """
+    Filter stored records on the indexed columns and, optionally,
+    full-text search the summaries. Returns a list of dicts, ordered by the
+    ranged column or most recently processed first.
+    Search results come newest first by when the file was first stored
+    (reprocessing keeps its position), an order FTS5 streams directly,
+    stopping at 'limit'. With 'rank' they are ordered by BM25 relevance
+    instead; that scores every match, so it gets slow for common terms.
+    With 'raw_search', 'search' is passed to FTS5 MATCH unchanged, so invalid
+    query syntax raises sqlite3.OperationalError.
+    """
+    columns = ["m.file_hash", "m.source", "m.file_path", "m.file_type", "m.file_size"]
+    columns += [f"m.{c}" for c in STRUCTURE_COLUMNS]
+    columns += ["m.summary", "m.error", "m.processed_at"]
+    if include_result:
+        columns.append("m.result_json")
+
+    clauses = []
+    params = []
+    joins = ""
+    # Order by the ranged column when there is one, so SQLite can walk that
+    # index and stop at 'limit' instead of sorting every match.
+    if min_rows is not None or max_rows is not None:
+        order = "m.rows DESC"
+    elif min_pages is not None:
+        order = "m.pages DESC"
+    else:
+        order = "m.processed_at DESC"
+
+    if search and search.strip():
+        if _has_fts(conn):
+            joins = "JOIN file_summaries_fts f ON f.rowid = m.id"
+            clauses.append("file_summaries_fts MATCH ?")
+            params.append(search if raw_search else _fts_phrase_query(search))
+            order = "f.rank" if rank else "f.rowid DESC"
+        else:
+            clauses.append("(m.summary LIKE ? OR m.file_name LIKE ?)")
+            params += [f"%{search}%", f"%{search}%"]
+
+    filters = [
+        ("m.file_hash = ?", file_hash),
+        ("m.file_type = ?", file_type),
+        ("m.file_name = ?", name),
+        ("m.rows >= ?", min_rows),
+        ("m.rows <= ?", max_rows),
+        ("m.pages >= ?", min_pages),
+    ]
+    for clause, value in filters:
+        if value is not None:
+            clauses.append(clause)
+            params.append(value)
+
+    sql = f"SELECT {', '.join(columns)} FROM file_metadata m {joins}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {order} LIMIT ?"
+    params.append(limit)
+
+    records = []
+    for row in conn.execute(sql, params):
+        record = dict(row)
+        if include_result:
+            record["result"] = json.loads(record.pop("result_json"))
+        records.append(record)
+    return records
+
+
+def export_structure(conn: sqlite3.Connection, output_path: str, chunk_size: int = 50000) -> int:
+    """
+    Export the structure fields of every stored file to a columnar file.
+    '.parquet' writes Parquet (requires pyarrow); anything else is CSV.
+    Rows are streamed in chunks of 'chunk_size', so memory stays flat no matter
+    how many files are stored. Returns the number of exported records.
+    """
+    columns = ["file_hash", "source", "file_path", "file_type", "file_size"]
+    columns += STRUCTURE_COLUMNS + ["processed_at"]
+    cursor = conn.execute(
+        f"SELECT {', '.join(columns)} FROM file_metadata ORDER BY id"
+    )
+
+    count = 0
+    if output_path.lower().endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Explicit types keep count columns integral even when a chunk is all NULL
+        types = {c: pa.int64() for c in STRUCTURE_COLUMNS + ["file_size"]}
+        types["processed_at"] = pa.float64()
+        schema = pa.schema([(c, types.get(c, pa.string())) for c in columns])
+        with pq.ParquetWriter(output_path, schema) as writer:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                batch = {c: [row[i] for row in rows] for i, c in enumerate(columns)}
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                count += len(rows)
+    else:
+        with open(output_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                writer.writerows(tuple(row) for row in rows)
+                count += len(rows)
+
+    logger.info(f"Exported {count} records to {output_path}")
+    return count
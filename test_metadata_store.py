@@ -0,0 +1,167 @@
+# test_metadata_store.py
+import csv
+
+import pytest
+
+import metadata_store
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = metadata_store.open_store(str(tmp_path / "metadata.db"))
+    yield conn
+    conn.close()
+
+
+def make_file(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def csv_result(path, rows, insights):
+    return {
+        "file_path": path,
+        "file_type": "csv",
+        "structure": {
+            "rows": rows,
+            "cols": 2,
+            "factual_data": {"factual_rows": rows, "factual_cols": 2},
+        },
+        "abstracted_data": {"insights": insights},
+    }
+
+
+def text_result(path, summary):
+    return {
+        "file_path": path,
+        "file_type": "text",
+        "structure": {"length": 42, "lines": 3},
+        "abstracted_data": {"full_doc_summary": summary},
+        "raw_text": "the whole document",
+    }
+
+
+def test_open_store_without_create_does_not_make_a_store(tmp_path):
+    missing = tmp_path / "typo.db"
+    with pytest.raises(FileNotFoundError):
+        metadata_store.open_store(str(missing), create=False)
+    assert not missing.exists()
+
+
+def test_upsert_updates_record_and_search_index(conn, tmp_path):
+    path = make_file(tmp_path, "notes.txt", "hello")
+    file_hash = metadata_store.upsert_result(conn, text_result(path, "A greeting to the planet"))
+    metadata_store.upsert_result(conn, text_result(path, "A cosmic salutation"))
+
+    assert conn.execute("SELECT COUNT(*) FROM file_metadata").fetchone()[0] == 1
+    assert metadata_store.query_results(conn, search="planet") == []
+    [record] = metadata_store.query_results(conn, search="cosmic", include_result=True)
+    assert record["file_hash"] == file_hash
+    assert record["text_length"] == 42
+    assert "raw_text" not in record["result"]
+
+
+def test_filtered_queries(conn, tmp_path):
+    small = make_file(tmp_path, "small.csv", "1,2\n")
+    large = make_file(tmp_path, "large.csv", "3,4\n")
+    notes = make_file(tmp_path, "notes.txt", "hello")
+    metadata_store.upsert_result(conn, csv_result(small, 10, "tiny table"))
+    metadata_store.upsert_result(conn, csv_result(large, 20000, "big table"))
+    metadata_store.upsert_result(conn, text_result(notes, "prose"))
+
+    big = metadata_store.query_results(conn, min_rows=10000)
+    assert [r["file_path"] for r in big] == [large]
+    assert len(metadata_store.query_results(conn, file_type="csv")) == 2
+    assert len(metadata_store.query_results(conn, file_type="csv", max_rows=100)) == 1
+    assert metadata_store.query_results(conn, name="notes.txt")[0]["file_type"] == "text"
+    assert metadata_store.query_results(conn, min_pages=1) == []
+
+
+@pytest.mark.parametrize("search", ["e-mail", "C++", "don't", "revenue: growth", '"quoted"'])
+def test_search_with_punctuation(conn, tmp_path, search):
+    path = make_file(tmp_path, "memo.txt", "memo")
+    summary = "Send an e-mail on C++ revenue: growth, don't forget the \"quoted\" part"
+    metadata_store.upsert_result(conn, text_result(path, summary))
+
+    assert len(metadata_store.query_results(conn, search=search)) == 1
+
+
+def test_raw_search_passes_fts_syntax_through(conn, tmp_path):
+    path = make_file(tmp_path, "memo.txt", "memo")
+    metadata_store.upsert_result(conn, text_result(path, "quarterly revenue report"))
+
+    assert len(metadata_store.query_results(conn, search="quart*", raw_search=True)) == 1
+    with pytest.raises(metadata_store.sqlite3.OperationalError):
+        metadata_store.query_results(conn, search="revenue:", raw_search=True)
+
+
+def test_search_order_recent_or_ranked(conn, tmp_path):
+    relevant = make_file(tmp_path, "relevant.txt", "a")
+    passing = make_file(tmp_path, "passing.txt", "b")
+    metadata_store.upsert_result(conn, text_result(relevant, "revenue revenue revenue"))
+    metadata_store.upsert_result(conn, text_result(passing, "revenue mentioned once among many other words"))
+
+    recent = metadata_store.query_results(conn, search="revenue")
+    assert [r["file_path"] for r in recent] == [passing, relevant]
+    ranked = metadata_store.query_results(conn, search="revenue", rank=True)
+    assert [r["file_path"] for r in ranked] == [relevant, passing]
+
+
+def test_like_fallback_without_fts(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        metadata_store, "FTS_SCHEMA", "CREATE VIRTUAL TABLE broken USING no_such_module(a);"
+    )
+    conn = metadata_store.open_store(str(tmp_path / "metadata.db"))
+    path = make_file(tmp_path, "memo.txt", "memo")
+    metadata_store.upsert_result(conn, text_result(path, "Send an e-mail today"))
+
+    assert not metadata_store._has_fts(conn)
+    assert len(metadata_store.query_results(conn, search="e-mail")) == 1
+    assert metadata_store.query_results(conn, search="fax") == []
+    conn.close()
+
+
+def test_relative_path_is_stored_absolute(conn, tmp_path, monkeypatch):
+    path = make_file(tmp_path, "data.csv", "1,2\n")
+    monkeypatch.chdir(tmp_path)
+    metadata_store.upsert_result(conn, csv_result("data.csv", 1, "table"))
+
+    [record] = metadata_store.query_results(conn, include_result=True)
+    assert record["file_path"] == path
+    assert record["result"]["file_path"] == path
+
+
+def test_source_path_and_numpy_like_counts(conn, tmp_path):
+    class FakeNumpyInt:
+        def __init__(self, value):
+            self.value = value
+
+        def item(self):
+            return self.value
+
+        def __int__(self):
+            return self.value
+
+    temp_copy = make_file(tmp_path, "upload.csv", "1,2\n")
+    results = csv_result(temp_copy, FakeNumpyInt(5), "table")
+    metadata_store.upsert_result(conn, results, source="streamlit", source_path="upload.csv")
+
+    [record] = metadata_store.query_results(conn, include_result=True)
+    assert record["source"] == "streamlit"
+    assert record["file_path"] == "upload.csv"
+    assert record["rows"] == 5
+    assert record["result"]["structure"]["factual_data"]["factual_rows"] == 5
+
+
+def test_export_structure_csv(conn, tmp_path):
+    for i in range(3):
+        path = make_file(tmp_path, f"f{i}.csv", f"{i}\n")
+        metadata_store.upsert_result(conn, csv_result(path, i + 1, "table"))
+    output = str(tmp_path / "structure.csv")
+
+    assert metadata_store.export_structure(conn, output, chunk_size=2) == 3
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["rows"] for r in rows] == ["1", "2", "3"]
+    assert rows[0]["pages"] == ""